@@ -1,5 +1,65 @@
 import itertools
 import random
+import sys
+from array import array
+from collections import defaultdict, deque
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; without it _nearby runs as a plain Python loop
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# Offsets of the eight cells surrounding a cell
+DIRS = (
+    (-1, 0),
+    (1, 0),
+    (0, -1),
+    (0, 1),
+    (-1, -1),
+    (-1, 1),
+    (1, -1),
+    (1, 1),
+)
+
+
+@njit(cache=True, boundscheck=False)
+def _nearby(board, i, j, h, w):
+    """
+    Counts the mines around (i, j) on a uint8 board of shape (h, w),
+    not including the cell itself.
+    """
+    count = 0
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            if di | dj:
+                ii = i + di
+                jj = j + dj
+                if 0 <= ii < h and 0 <= jj < w:
+                    count += board[ii, jj]
+    return count
+
+
+@lru_cache(maxsize=None)
+def _neighbor_masks(height, width):
+    """
+    Returns, for each flat cell index k = i * width + j, a bitmask
+    of the in-bounds cells surrounding it.
+    """
+    masks = []
+    for i in range(height):
+        for j in range(width):
+            mask = 0
+            for di, dj in DIRS:
+                if 0 <= i + di < height and 0 <= j + dj < width:
+                    mask |= 1 << ((i + di) * width + j + dj)
+            masks.append(mask)
+    return tuple(masks)
 
 
 class Minesweeper:
@@ -12,23 +72,22 @@ class Minesweeper:
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Initialize an empty field with no mines (C-contiguous for _nearby)
+        self.board = np.zeros((height, width), dtype=np.uint8)
+
+        # Add mines randomly, drawing distinct flat indices without rejection
+        idx = random.sample(range(height * width), mines)
+        self.board.flat[idx] = 1
+        self.mines = {divmod(k, width) for k in idx}
+
+        # Boards that fit in 64 bits also keep a bitboard of the mines
+        self._nmask = None
+        if height * width <= 64:
+            self._bb = 0
+            for k in idx:
+                self._bb |= 1 << k
+            self._nmask = _neighbor_masks(height, width)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -38,19 +97,16 @@ class Minesweeper:
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
-            print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
-        print("--" * self.width + "-")
+        sep = "--" * self.width + "-"
+        lines = []
+        for row in np.where(self.board, "X", " ").tolist():
+            lines.append(sep)
+            lines.append("|" + "|".join(row) + "|")
+        lines.append(sep)
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +114,10 @@ class Minesweeper:
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        if self._nmask is not None:
+            return (self._bb & self._nmask[i * self.width + j]).bit_count()
+        return int(_nearby(self.board, i, j, self.height, self.width))
 
     def won(self):
         """
@@ -91,28 +133,42 @@ class Sentence:
     and a count of the number of those cells which are mines.
     """
 
+    __slots__ = ("cells", "count", "n")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
+        # Number of cells, kept in step with self.cells
+        self.n = len(self.cells)
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        # Cheap scalar checks first; the frozenset walk is the last resort
+        return self is other or (
+            self.count == other.count
+            and self.n == other.n
+            and self.cells == other.cells
+        )
+
+    def __hash__(self):
+        # Not cached: mark_mine and mark_safe rebind self.cells
+        return hash((self.cells, self.count))
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if self.count == len(self.cells):
+        if self.count == self.n:
             return self.cells
-        return set()
+        return frozenset()
 
     def known_safes(self):
         if self.count == 0:
             return self.cells
-        return set()
+        return frozenset()
 
     def mark_mine(self, cell):
         """
@@ -120,7 +176,8 @@ class Sentence:
         a cell is known to be a mine.
         """
         if cell in self.cells:
-            self.cells.discard(cell)
+            self.cells = self.cells - {cell}
+            self.n -= 1
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -129,7 +186,70 @@ class Sentence:
         a cell is known to be safe.
         """
         if cell in self.cells:
-            self.cells.discard(cell)
+            self.cells = self.cells - {cell}
+            self.n -= 1
+
+
+class _SentenceView(Sentence):
+    """
+    Read-only sentence backed by one row of MinesweeperAI's knowledge-base
+    arrays. The knowledge base is only changed through the AI, so that its
+    indexes stay in step with the sentences.
+    """
+
+    __slots__ = ("_cells", "_counts", "_sizes", "_sid")
+
+    def __init__(self, cells, counts, sizes, sid):
+        self._cells = cells
+        self._counts = counts
+        self._sizes = sizes
+        self._sid = sid
+
+    @property
+    def cells(self):
+        return self._cells[self._sid]
+
+    @property
+    def count(self):
+        return self._counts[self._sid]
+
+    @property
+    def n(self):
+        return self._sizes[self._sid]
+
+    def mark_mine(self, cell):
+        raise TypeError("use MinesweeperAI.mark_mine to update the knowledge base")
+
+    def mark_safe(self, cell):
+        raise TypeError("use MinesweeperAI.mark_safe to update the knowledge base")
+
+
+class _KnowledgeBase(Sequence):
+    """
+    Sequence of read-only views over MinesweeperAI's knowledge base.
+    Appending a sentence adds it through MinesweeperAI.add_sentence.
+    """
+
+    __slots__ = ("_ai",)
+
+    def __init__(self, ai):
+        self._ai = ai
+
+    def __len__(self):
+        return len(self._ai._kb_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        ai = self._ai
+        return _SentenceView(ai._cells, ai._counts, ai._sizes, ai._kb_ids[index])
+
+    def append(self, sentence):
+        self._ai.add_sentence(sentence)
+
+    def extend(self, sentences):
+        for sentence in sentences:
+            self._ai.add_sentence(sentence)
 
 
 class MinesweeperAI:
@@ -150,26 +270,188 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Every sentence ever added, addressed by id and stored as parallel
+        # arrays of cells, mine counts and cell counts, and the ids of the
+        # sentences currently in the knowledge base
+        self._cells = []
+        self._counts = array("h")
+        self._sizes = array("h")
+        self._kb_ids = []
+
+        # Union-find over sentence ids; sentences that end up with the same
+        # cells are merged and only the representative is kept
+        self._parent = []
+        self._rank = []
+
+        # Ids of sentences that are new or have shrunk since they were last checked
+        self._dirty = deque()
+
+        # Cells marked since the last flush, and the ids of the sentences
+        # that still mention them
+        self._pending_mines = set()
+        self._pending_safes = set()
+        self._touched = set()
+
+        # Ids of the sentences that mention each cell
+        self._by_cell = {}
+
+        # Id of the representative sentence for each set of cells
+        self._canon = {}
+
+        # In-bounds neighbors of every cell, fixed by the board shape
+        self._neighbor_table = {
+            (r, c): tuple(
+                (r + dr, c + dc)
+                for dr, dc in DIRS
+                if 0 <= r + dr < height and 0 <= c + dc < width
+            )
+            for r in range(height)
+            for c in range(width)
+        }
+
+    @property
+    def knowledge(self):
+        """
+        Sentences about the game known to be true.
+
+        The sentences are read-only views; the knowledge base can only be
+        changed through add_knowledge, add_sentence, mark_mine and
+        mark_safe. append and extend on the sequence go through add_sentence.
+        """
+        return _KnowledgeBase(self)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self._queue_mine(cell)
+        self.update_knowledge_base()
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        self._queue_safe(cell)
+        self.update_knowledge_base()
+
+    def _queue_mine(self, cell):
+        """
+        Marks a cell as a mine, leaving the knowledge base
+        to be updated on the next flush.
+        """
+        self.mines.add(cell)
+        self._pending_mines.add(cell)
+        self._touched.update(self._by_cell.pop(cell, ()))
+
+    def _queue_safe(self, cell):
+        """
+        Marks a cell as safe, leaving the knowledge base
+        to be updated on the next flush.
+        """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self._pending_safes.add(cell)
+        self._touched.update(self._by_cell.pop(cell, ()))
+
+    def _flush(self):
+        """
+        Removes the cells marked since the last flush from every sentence
+        that mentions them, one set difference per sentence, and queues
+        those sentences to be checked.
+        """
+        mines = self._pending_mines
+        marked = mines | self._pending_safes
+        for sid in self._touched:
+            self._unregister(sid)
+            cells = self._cells[sid]
+            self._counts[sid] -= len(cells & mines)
+            cells = cells - marked
+            self._cells[sid] = cells
+            self._sizes[sid] = len(cells)
+            self._dirty.append(self._register(sid))
+        self._pending_mines.clear()
+        self._pending_safes.clear()
+        self._touched.clear()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, indexing it by
+        each of its cells and queueing it to be checked.
+
+        Cells already known to be mines or safe are left out, and the
+        count is reduced by the known mines, so that every sentence
+        only ever mentions undecided cells.
+        """
+        cells = frozenset(
+            c for c in sentence.cells if c not in self.mines and c not in self.safes
+        )
+        count = sentence.count - len(self.mines.intersection(sentence.cells))
+
+        sid = len(self._cells)
+        self._cells.append(cells)
+        self._counts.append(count)
+        self._sizes.append(len(cells))
+        self._parent.append(sid)
+        self._rank.append(0)
+        self._kb_ids.append(sid)
+        for cell in cells:
+            self._by_cell.setdefault(cell, set()).add(sid)
+        self._dirty.append(self._register(sid))
+
+    def _find(self, sid):
+        """
+        Returns the representative id of the sentence `sid` was merged into.
+        """
+        parent = self._parent
+        while parent[sid] != sid:
+            parent[sid] = parent[parent[sid]]
+            sid = parent[sid]
+        return sid
+
+    def _union(self, a, b):
+        """
+        Merges the sentences `a` and `b` and returns the representative id.
+        """
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a
+        if self._rank[a] < self._rank[b]:
+            a, b = b, a
+        self._parent[b] = a
+        if self._rank[a] == self._rank[b]:
+            self._rank[a] += 1
+        return a
+
+    def _register(self, sid):
+        """
+        Records sentence `sid` under its cells, merging it with any
+        sentence already known over the same cells. Returns the id
+        of the representative.
+        """
+        cells = self._cells[sid]
+        if not cells:
+            return sid
+        other = self._canon.get(cells)
+        if other is None or other == sid:
+            self._canon[cells] = sid
+            return sid
+
+        # Keep the representative, and drop the other one from the index
+        root = self._union(sid, other)
+        dropped = other if root == sid else sid
+        for cell in cells:
+            self._by_cell[cell].discard(dropped)
+        self._canon[cells] = root
+        return root
+
+    def _unregister(self, sid):
+        """
+        Removes sentence `sid` from the map of known cell sets.
+        """
+        cells = self._cells[sid]
+        if self._canon.get(cells) == sid:
+            del self._canon[cells]
 
     def add_knowledge(self, cell, count):
         """
@@ -182,97 +464,121 @@ class MinesweeperAI:
             3) Adds a new sentence to the AI's knowledge base.
             4) Marks any additional cells as safe or as mines if it can be concluded.
             5) Infers new sentences from existing knowledge.
+        Steps 4 and 5 are repeated until neither makes progress.
         """
         # Step 1: Mark the cell as a move that has been made
         self.moves_made.add(cell)
 
-        # Step 2: Mark the cell as safe
-        self.mark_safe(cell)
+        # Step 2: Mark the cell as safe; the knowledge base catches up below
+        self._queue_safe(cell)
 
         # Step 3: Add a new sentence to the knowledge base
         neighbors = self.find_cell_neighbors(cell)
-        new_sentence = Sentence(neighbors, count)
-        self.knowledge.append(new_sentence)
+        self.add_sentence(Sentence(neighbors, count))
 
-        # Step 4: Mark cells as safe or mines based on current knowledge
-        self.update_knowledge_base()
+        # Steps 4 and 5: Mark cells and infer new sentences until saturated
+        self._saturate()
 
-        # Step 5: Infer new sentences from existing knowledge
-        self.infer_new_sentences()
+    def _saturate(self):
+        """
+        Alternates marking cells from the knowledge base and inferring
+        new sentences until neither makes progress, so that inferred
+        sentences are used right away.
+        """
+        while True:
+            self.update_knowledge_base()
+            if not self.infer_new_sentences():
+                break
 
     def update_knowledge_base(self):
         """
         Updates the knowledge base by marking cells as safe or mines
         whenever possible, based on existing knowledge.
         """
-        changes = True
-        while changes:
-            changes = False
-            # Check each sentence for known safes and mines
-            for sentence in self.knowledge:
-                safes = sentence.known_safes().copy()
-                mines = sentence.known_mines().copy()
-
-                # Mark cells as safe
-                if safes:
-                    changes = True
-                    for safe in safes:
-                        self.mark_safe(safe)
-
-                # Mark cells as mines
-                if mines:
-                    changes = True
-                    for mine in mines:
-                        self.mark_mine(mine)
-
-        # Remove empty sentences
-        self.knowledge = [s for s in self.knowledge if s.cells]
+        # Only sentences that changed can yield new safes or mines
+        self._flush()
+        while self._dirty:
+            sid = self._find(self._dirty.popleft())
+
+            # Branch on the count before touching the cells; cells are
+            # rebound, not mutated, so they can be iterated directly
+            count = self._counts[sid]
+            if count == 0:
+                for safe in self._cells[sid]:
+                    self._queue_safe(safe)
+            elif count == self._sizes[sid]:
+                for mine in self._cells[sid]:
+                    self._queue_mine(mine)
+
+            # Apply this round's marks once the queue runs dry
+            if not self._dirty:
+                self._flush()
+
+        # Remove empty and merged sentences
+        self._kb_ids = [
+            sid
+            for sid in self._kb_ids
+            if self._parent[sid] == sid and self._sizes[sid]
+        ]
 
     def infer_new_sentences(self):
         """
         Infers new sentences based on subset relationships in the knowledge base.
+        Returns whether any sentence was added or any cell was marked.
         """
+        # Group sentences by size; s1 is only tested against the buckets
+        # of strictly larger sentences, the only ones that can contain it
+        buckets = defaultdict(list)
+        for sid in self._kb_ids:
+            buckets[self._sizes[sid]].append(sid)
+        sizes = sorted(buckets)
+
         inferred = []
-        for s1 in self.knowledge:
-            for s2 in self.knowledge:
-                if s1 != s2 and s1.cells.issubset(s2.cells):
-                    # Infer a new sentence
-                    new_cells = s2.cells - s1.cells
-                    new_count = s2.count - s1.count
-                    new_sentence = Sentence(new_cells, new_count)
-
-                    # Ensure the new sentence is not redundant
-                    if (
-                        new_sentence not in self.knowledge
-                        and new_sentence not in inferred
-                    ):
-                        inferred.append(new_sentence)
+        inferred_keys = set()
+        marked = False
+        for i, size1 in enumerate(sizes):
+            for s1 in buckets[size1]:
+                cells1 = self._cells[s1]
+                for size2 in sizes[i + 1:]:
+                    for s2 in buckets[size2]:
+                        cells2 = self._cells[s2]
+                        if not cells1 <= cells2:
+                            continue
+
+                        # Infer a new sentence
+                        new_cells = cells2 - cells1
+                        new_count = self._counts[s2] - self._counts[s1]
+                        new_size = size2 - size1
+
+                        # Ensure the new sentence is not redundant
+                        if new_cells in self._canon or new_cells in inferred_keys:
+                            continue
+                        inferred_keys.add(new_cells)
+
+                        # Mark the cells of a determinate sentence right away
+                        # rather than adding it only to be resolved later
+                        if new_count == 0:
+                            for cell in new_cells:
+                                self._queue_safe(cell)
+                            marked = True
+                        elif new_count == new_size:
+                            for cell in new_cells:
+                                self._queue_mine(cell)
+                            marked = True
+                        else:
+                            inferred.append(Sentence(new_cells, new_count))
 
         # Add all inferred sentences to the knowledge base
-        self.knowledge.extend(inferred)
+        for sentence in inferred:
+            self.add_sentence(sentence)
+
+        # Apply the marks so the knowledge base is consistent on return
+        if marked:
+            self.update_knowledge_base()
+        return marked or bool(inferred)
 
     def find_cell_neighbors(self, cell):
-        row, col = cell
-        candidates = (
-            (row - 1, col),
-            (row + 1, col),
-            (row, col - 1),
-            (row, col + 1),
-            (row - 1, col - 1),
-            (row - 1, col + 1),
-            (row + 1, col - 1),
-            (row + 1, col + 1),
-        )
-        neighbors = []
-        for candidate in candidates:
-            r, c = candidate
-            if (
-                candidate not in self.moves_made
-                and 0 <= r < self.height
-                and 0 <= c < self.width
-            ):
-                neighbors.append(candidate)
-        return neighbors
+        return [n for n in self._neighbor_table[cell] if n not in self.moves_made]
 
     def make_safe_move(self):
         """
@@ -283,11 +589,16 @@ class MinesweeperAI:
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        possible_moves = []
+        # Reservoir-sample one unplayed safe cell without building a list
+        move = None
+        seen = 0
         for c in self.safes:
-            if c not in self.moves_made:
-                possible_moves.append(c)
-        return random.choice(possible_moves) if possible_moves else None
+            if c in self.moves_made:
+                continue
+            seen += 1
+            if random.random() * seen < 1:
+                move = c
+        return move
 
     def make_random_move(self):
         """
@@ -296,16 +607,17 @@ class MinesweeperAI:
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        possible_moves = [
-            (row, col)
-            for row in range(self.height)
-            for col in range(self.width)
-            if (row, col) not in self.moves_made and (row, col) not in self.mines
-        ]
+        # Build a flat mask of the blocked cells from the sets themselves
+        blocked = np.zeros(self.height * self.width, dtype=bool)
+        taken = self.moves_made | self.mines
+        if taken:
+            rows, cols = np.array(list(taken)).T
+            blocked[rows * self.width + cols] = True
+        free = np.flatnonzero(~blocked)
 
         # If there are no valid moves, return None
-        if not possible_moves:
+        if not free.size:
             return None
 
         # Randomly select a move from the possible moves
-        return random.choice(possible_moves)
+        return divmod(int(free[random.randrange(free.size)]), self.width)